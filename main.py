@@ -1,110 +1,184 @@
 # -*- coding: utf-8 -*-
 
+import hashlib
 import os
 import sys
+import shutil
+import time
 import ttkbootstrap as tb
-from ttkbootstrap.constants import *
+from ttkbootstrap.constants import (
+    BOTH,
+    CENTER,
+    DANGER,
+    INFO,
+    LEFT,
+    PRIMARY,
+    RIGHT,
+    SECONDARY,
+    SUCCESS,
+    WARNING,
+    X,
+)
 from tkinterdnd2 import DND_FILES, TkinterDnD
 from ttkbootstrap.icons import Icon
 import tkinter as tk
 from tkinter import filedialog, scrolledtext, messagebox
-from io import BytesIO
-from threading import Event, current_thread, main_thread
-import mimetypes
-import requests
-from datetime import datetime
-import configparser
+from io import BytesIO, StringIO
+from threading import Event, Lock, current_thread, main_thread
+from collections import deque
+from functools import lru_cache
 from dataclasses import dataclass, field
 from typing import Callable, Optional, List, Tuple
 
 from utils import (
     normalize_host,
     get_filename_suffix,
-    run_async,
+    WorkerPool,
+    MultipartFileStream,
     get_idle_seconds,
     decode_response_content,
+    safe_json,
 )
 
 # ============================
 # 网络请求客户端（网络访问层）
 # ============================
+@lru_cache(maxsize=256)
+def _guess_mime(ext):
+    import mimetypes
+
+    return mimetypes.guess_type("file" + ext)[0] or "application/octet-stream"
+
+
+class _ErrorResponse:
+    __slots__ = ()
+
+    status_code = 500
+    content = b""
+
+    @staticmethod
+    def json():
+        return {}
+
+    @staticmethod
+    def iter_content(chunk_size=8192):
+        return iter(())
+
+    @staticmethod
+    def close():
+        pass
+
+
+_ERROR_RESPONSE = _ErrorResponse()
+
+
 class RequestClient:
+    API_TIMEOUT = (3, 15)
+    TRANSFER_TIMEOUT = (5, 300)
+
     def __init__(self, error_handler=None):
-        self.host = ""
         self.error_handler = error_handler
-        self.session = requests.Session()
+        self._session = None
+        self._session_lock = Lock()
+        self.host = ""
 
-    def _build_base_urls(self):
-        base = f"http://{self.host}/cloudcenter/conversionNew"
-        return {
+    @property
+    def session(self):
+        if self._session is None:
+            with self._session_lock:
+                if self._session is None:
+                    self._session = self._create_session()
+        return self._session
+
+    def _create_session(self):
+        import requests
+        from requests.adapters import HTTPAdapter
+        from urllib3.util.retry import Retry
+
+        session = requests.Session()
+        adapter = HTTPAdapter(
+            pool_connections=4,
+            pool_maxsize=32,
+            max_retries=Retry(
+                total=2,
+                backoff_factor=0.2,
+                status_forcelist=[502, 503, 504],
+                raise_on_status=False,
+            ),
+        )
+        session.mount("http://", adapter)
+        session.cookies.set("_systemType_", "_NANJING_")
+        session.headers.update(
+            {
+                "Connection": "keep-alive",
+                "accept-language": "zh-CN,zh;q=0.9",
+                "User-Agent": (
+                    "Mozilla/5.0 (Windows NT 10.0; Win64; x64) "
+                    "AppleWebKit/537.36 (KHTML, like Gecko) "
+                    "Chrome/142.0.0.0 Safari/537.36"
+                ),
+            }
+        )
+        return session
+
+    @property
+    def host(self):
+        return self._host
+
+    @host.setter
+    def host(self, value):
+        self._host = value
+        self._rebuild_request_cache()
+
+    def _rebuild_request_cache(self):
+        base = f"http://{self._host}/cloudcenter/conversionNew"
+        self._urls = {
             "resolve": f"{base}/resolveCode",
             "upload": f"{base}/uploadFile",
             "file_list": f"{base}/getFileListForDownCode",
             "download": f"{base}/downLoadFile",
         }
 
-    def _build_cookies(self):
-        return {"_systemType_": "_NANJING_"}
-
-    def _build_headers(self, *, x_requested=False, content_type=False):
         headers = {
-            "Origin": f"http://{self.host}",
-            "Referer": f"http://{self.host}/cloudcenter/nj_home.html",
-            "accept-language": "zh-CN,zh;q=0.9",
-            "User-Agent": (
-                "Mozilla/5.0 (Windows NT 10.0; Win64; x64) "
-                "AppleWebKit/537.36 (KHTML, like Gecko) "
-                "Chrome/142.0.0.0 Safari/537.36"
-            ),
+            "Origin": f"http://{self._host}",
+            "Referer": f"http://{self._host}/cloudcenter/nj_home.html",
+        }
+        x_requested = {"x-requested-with": "XMLHttpRequest"}
+        content_type = {"content-type": "application/x-www-form-urlencoded; charset=UTF-8"}
+        self._headers_table = {
+            (False, False): headers,
+            (True, False): {**headers, **x_requested},
+            (False, True): {**headers, **content_type},
+            (True, True): {**headers, **x_requested, **content_type},
         }
-        if x_requested:
-            headers["x-requested-with"] = "XMLHttpRequest"
-        if content_type:
-            headers["content-type"] = "application/x-www-form-urlencoded; charset=UTF-8"
-        return headers
-
-    def safe_request(self, method, url, **kwargs):
-        try:
-            resp = self.session.request(method, url, timeout=(3, 60), **kwargs)
 
-            _raw_json = resp.json
+    def _build_headers(self, *, x_requested=False, content_type=False):
+        return self._headers_table[(x_requested, content_type)]
 
-            def _safe_json():
-                try:
-                    return _raw_json()
-                except Exception:
-                    return {}
+    def close(self):
+        if self._session is not None:
+            self._session.close()
 
-            resp.json = _safe_json
-            return resp
-        except Exception as e:
+    def safe_request(self, method, url, timeout=API_TIMEOUT, **kwargs):
+        session = self.session
+        try:
+            return session.request(method, url, timeout=timeout, **kwargs)
+        # requests.RequestException subclasses OSError, as do local file read errors.
+        except OSError as e:
             if self.error_handler:
                 self.error_handler(e, url)
-            return type(
-                "Resp",
-                (object,),
-                {
-                    "status_code": 500,
-                    "json": staticmethod(lambda: {}),
-                    "content": b"",
-                    "iter_content": staticmethod(lambda chunk_size=8192: []),
-                    "error": e,
-                },
-            )()
+            return _ERROR_RESPONSE
 
     def resolve_code(self, code_value):
-        urls = self._build_base_urls()
         return self.safe_request(
             "post",
-            urls["resolve"],
+            self._urls["resolve"],
             data={"code": code_value},
-            cookies=self._build_cookies(),
             headers=self._build_headers(x_requested=True, content_type=True),
         )
 
     def upload_file(self, code_value, file_name, file_size, file_obj):
-        urls = self._build_base_urls()
-        mime = mimetypes.guess_type(file_name)[0] or "application/octet-stream"
+        mime = _guess_mime(os.path.splitext(file_name)[1].lower())
         data = {
             "name": file_name,
             "code": code_value,
@@ -112,41 +186,44 @@ class RequestClient:
             "size": file_size,
             "fileName": file_name,
         }
-        files = {"Filedata": (file_name, file_obj, mime)}
+        body = MultipartFileStream(data, "Filedata", file_name, file_obj, file_size, mime)
         return self.safe_request(
             "post",
-            urls["upload"],
-            data=data,
-            files=files,
-            cookies=self._build_cookies(),
-            headers=self._build_headers(),
+            self._urls["upload"],
+            data=body,
+            headers={**self._build_headers(), "Content-Type": body.content_type},
+            timeout=self.TRANSFER_TIMEOUT,
         )
 
-    def get_file_list(self, code_value):
-        urls = self._build_base_urls()
+    def get_file_list(self, code_value, etag=None, last_modified=None):
         params = {
             "code": code_value,
             "order": "ctime",
             "asc": "desc",
-            "_": int(datetime.now().timestamp() * 1000),
+            "_": time.time_ns() // 1_000_000,
         }
+        headers = self._build_headers(x_requested=True)
+        if etag or last_modified:
+            headers = dict(headers)
+            if etag:
+                headers["If-None-Match"] = etag
+            if last_modified:
+                headers["If-Modified-Since"] = last_modified
         return self.safe_request(
             "get",
-            urls["file_list"],
+            self._urls["file_list"],
             params=params,
-            cookies=self._build_cookies(),
-            headers=self._build_headers(x_requested=True),
+            headers=headers,
         )
 
     def download_file(self, file_ids):
-        urls = self._build_base_urls()
         return self.safe_request(
             "post",
-            urls["download"],
+            self._urls["download"],
             data={"fileIds": file_ids},
-            cookies=self._build_cookies(),
             headers=self._build_headers(content_type=True),
             stream=True,
+            timeout=self.TRANSFER_TIMEOUT,
         )
 
 
@@ -178,8 +255,10 @@ def get_config_path(filename="config.ini"):
 class ConfigManager:
     def __init__(self, config_path: str, logger=None):
         self.config_path = config_path
-        self._config = configparser.ConfigParser()
         self.logger = logger
+        self._config = None
+        self._config_mtime = -1
+        self._config_digest = None
 
     def _log(self, msg: str):
         if self.logger:
@@ -191,40 +270,75 @@ class ConfigManager:
         if not self._config.has_section("session"):
             self._config.add_section("session")
 
-    def load_all(self) -> dict:
-        result = {"host": "", "code": ""}
-        if not os.path.exists(self.config_path):
-            return result
-
+    def _get_mtime(self) -> int:
         try:
-            self._config.read(self.config_path, encoding="utf-8")
-            result["host"] = self._config.get("server", "host", fallback="").strip()
-            result["code"] = self._config.get("session", "code", fallback="").strip()
-        except Exception as e:
-            self._log(f"[配置] 读取配置文件时发生错误：{e}")
-        return result
+            return os.stat(self.config_path).st_mtime_ns
+        except OSError:
+            return -1
 
-    def save(self, host: str = None, code: str = None):
-        if os.path.exists(self.config_path) and not self._config.sections():
+    def _ensure_loaded(self):
+        mtime = self._get_mtime()
+        if self._config is not None and mtime == self._config_mtime:
+            return
+
+        import configparser
+
+        self._config = configparser.ConfigParser()
+        self._config_mtime = mtime
+        self._config_digest = None
+        if mtime != -1:
             try:
                 self._config.read(self.config_path, encoding="utf-8")
-            except Exception:
+                self._config_digest = self._digest(self._serialize_config())
+            except Exception as e:
+                self._log(f"[配置] 读取配置文件时发生错误：{e}")
                 self._config = configparser.ConfigParser()
-
         self._ensure_sections()
 
+    def _serialize_config(self) -> str:
+        buf = StringIO()
+        self._config.write(buf)
+        return buf.getvalue()
+
+    def _digest(self, text: str) -> bytes:
+        return hashlib.blake2b(text.encode("utf-8"), digest_size=16).digest()
+
+    def load_all(self) -> dict:
+        self._ensure_loaded()
+        return {
+            "host": self._config.get("server", "host", fallback="").strip(),
+            "code": self._config.get("session", "code", fallback="").strip(),
+        }
+
+    def save(self, host: str = None, code: str = None):
+        self._ensure_loaded()
+
         if host is not None:
             self._config.set("server", "host", host)
         if code is not None:
             self._config.set("session", "code", code)
 
+        text = self._serialize_config()
+        digest = self._digest(text)
+        if digest == self._config_digest:
+            return
+
         try:
             config_dir = os.path.dirname(self.config_path)
             if config_dir:
                 os.makedirs(config_dir, exist_ok=True)
 
-            with open(self.config_path, "w", encoding="utf-8") as f:
-                self._config.write(f)
+            tmp_path = self.config_path + ".tmp"
+            try:
+                with open(tmp_path, "w", encoding="utf-8") as f:
+                    f.write(text)
+                os.replace(tmp_path, self.config_path)
+            except OSError:
+                if os.path.exists(tmp_path):
+                    os.remove(tmp_path)
+                raise
+            self._config_digest = digest
+            self._config_mtime = self._get_mtime()
             if host is not None:
                 self._log(f"[配置] 已保存服务器地址到配置文件：{self.config_path}")
             if code is not None:
@@ -253,6 +367,8 @@ class AppState:
     stop_event: Event = field(default_factory=Event)
     idle_threshold: int = 60
     idle_logged: bool = False
+    active_transfers: int = 0
+    host_configured: bool = False
 
 
 # ============================
@@ -267,9 +383,15 @@ class SchedulerInterface:
     def run_background(self, func: Callable, *args, **kwargs):
         raise NotImplementedError
 
+    def run_upload(self, func: Callable, *args, **kwargs):
+        raise NotImplementedError
+
     def call_ui(self, func: Callable, *args, **kwargs):
         raise NotImplementedError
 
+    def shutdown(self):
+        raise NotImplementedError
+
 
 class UILogger(LoggerInterface):
     def __init__(self, writer: Callable[[str], None]):
@@ -280,11 +402,23 @@ class UILogger(LoggerInterface):
 
 
 class TkScheduler(SchedulerInterface):
-    def __init__(self, root: tk.Misc):
+    def __init__(self, root: tk.Misc, max_workers: int = 8, max_upload_workers: int = 6):
         self.root = root
+        self.error_handler = None
+        self.pool = WorkerPool(max_workers, name="background", error_handler=self._on_task_error)
+        self.upload_pool = WorkerPool(
+            max_upload_workers, name="upload", error_handler=self._on_task_error
+        )
+
+    def _on_task_error(self, exception):
+        if self.error_handler:
+            self.error_handler(exception)
 
     def run_background(self, func: Callable, *args, **kwargs):
-        run_async(func, *args, **kwargs)
+        self.pool.submit(func, *args, **kwargs)
+
+    def run_upload(self, func: Callable, *args, **kwargs):
+        self.upload_pool.submit(func, *args, **kwargs)
 
     def call_ui(self, func: Callable, *args, **kwargs):
         if current_thread() is main_thread():
@@ -292,11 +426,21 @@ class TkScheduler(SchedulerInterface):
         else:
             self.root.after(0, lambda: func(*args, **kwargs))
 
+    def shutdown(self):
+        self.pool.shutdown()
+        self.upload_pool.shutdown()
+
 
 # ============================
 # 业务服务层
 # ============================
 class VerificationService:
+    POLL_INTERVAL = 60
+    POLL_MAX_INTERVAL = 300
+    POLL_FAILURE_BACKOFF = 2
+    POLL_MAX_FAILURES = 5
+    IDLE_CHECK_INTERVAL = 5
+
     def __init__(self, client: RequestClient, state: AppState):
         self.client = client
         self.state = state
@@ -311,7 +455,7 @@ class VerificationService:
     def check_code_once(self, code_value: str, locked_before_check: bool) -> dict:
         resp = self.client.resolve_code(code_value)
         if resp.status_code == 200:
-            json_data = resp.json()
+            json_data = safe_json(resp)
             if locked_before_check:
                 if json_data.get("success"):
                     return {
@@ -336,6 +480,7 @@ class VerificationService:
         else:
             return {
                 "continue_monitor": True,
+                "server_error": True,
                 "message": "[验证] 失败！服务器故障或服务器地址错误。",
             }
 
@@ -356,6 +501,8 @@ class VerificationService:
 
     def monitor_loop(self, code_value: str, on_tick: Callable[[dict], None]):
         self.state.current_code = code_value
+        interval = self.POLL_INTERVAL
+        failures = 0
         try:
             while not self.state.stop_event.is_set():
                 idle_seconds = get_idle_seconds()
@@ -369,12 +516,13 @@ class VerificationService:
                                 "message": f"[监控] 检测到用户已空闲超过 {self.state.idle_threshold} 秒，暂停验证码轮询。",
                             }
                         )
-                    if self.state.stop_event.wait(1):
+                    if self.state.stop_event.wait(self.IDLE_CHECK_INTERVAL):
                         break
                     continue
                 else:
                     if self.state.idle_logged:
                         self.state.idle_logged = False
+                        interval = self.POLL_INTERVAL
                         on_tick(
                             {
                                 "type": "idle_resume",
@@ -387,7 +535,25 @@ class VerificationService:
                 if not result.get("continue_monitor", True):
                     break
 
-                self.state.stop_event.wait(60)
+                if result.get("server_error"):
+                    failures += 1
+                    if failures >= self.POLL_MAX_FAILURES:
+                        on_tick(
+                            {
+                                "type": "poll_stopped",
+                                "message": f"[监控] 连续 {failures} 次请求失败，已停止验证码轮询，请检查网络或服务器地址后重新确认。",
+                            }
+                        )
+                        break
+                    if self.state.locked:
+                        interval = self.POLL_INTERVAL
+                    else:
+                        interval = min(interval * self.POLL_FAILURE_BACKOFF, self.POLL_MAX_INTERVAL)
+                else:
+                    failures = 0
+                    interval = self.POLL_INTERVAL
+
+                self.state.stop_event.wait(interval)
         finally:
             self.state.monitor_thread_started = False
 
@@ -396,8 +562,7 @@ class TransferService:
     def __init__(self, client: RequestClient):
         self.client = client
 
-    def upload_text(self, code_value: str, text_value: str, override_name: str = None):
-        file_bytes = text_value.encode("utf-8")
+    def upload_text(self, code_value: str, file_bytes: bytes, override_name: str = None):
         file_name = override_name or f"文本{get_filename_suffix()}.txt"
         file_size = len(file_bytes)
         file_obj = BytesIO(file_bytes)
@@ -406,11 +571,20 @@ class TransferService:
 
     def upload_local_file(self, code_value: str, file_path: str, override_name: str = None):
         file_name = override_name or os.path.basename(file_path)
-        file_size = os.path.getsize(file_path)
         with open(file_path, "rb") as f:
+            file_size = os.fstat(f.fileno()).st_size
             resp = self.client.upload_file(code_value, file_name, file_size, f)
         return resp, file_name
 
+    def _get_existing_file_names(self, code_value: str) -> set:
+        resp = self.client.get_file_list(code_value)
+        if resp.status_code != 200:
+            return set()
+        json_data = safe_json(resp)
+        if not json_data.get("success"):
+            return set()
+        return {f.get("fileName") for f in json_data.get("data") or []}
+
     def upload_with_retry(self, code_value, text_value = None, file_path = None, text_file_name = None):
         def _next_name(name, n):
             base, ext = os.path.splitext(name)
@@ -420,9 +594,11 @@ class TransferService:
             origin_name = os.path.basename(file_path)
         else:
             origin_name = text_file_name or f"文本{get_filename_suffix()}.txt"
+            text_bytes = text_value.encode("utf-8")
 
         logs = []
         attempt = 0
+        existing_names = None
 
         while True:
             if attempt == 0:
@@ -439,12 +615,12 @@ class TransferService:
             else:
                 resp, file_name = self.upload_text(
                     code_value,
-                    text_value,
+                    text_bytes,
                     override_name=override_name,
                 )
 
             if resp.status_code == 200:
-                json_data = resp.json()
+                json_data = safe_json(resp)
 
                 if json_data.get("success"):
                     logs.append(f"[上传] 成功，文件名为「{file_name}」")
@@ -458,7 +634,12 @@ class TransferService:
 
                 if msg == "中转上传文件中已存在同名文件":
                     logs.append(f"[上传] 已存在同名文件{file_name}，自动更名后重试")
+                    if existing_names is None:
+                        existing_names = self._get_existing_file_names(code_value)
+                    existing_names.add(file_name)
                     attempt += 1
+                    while _next_name(origin_name, attempt) in existing_names:
+                        attempt += 1
                     continue
 
                 if msg == "上传码已失效":
@@ -484,29 +665,48 @@ class TransferService:
 
 
 class DownloadService:
-    TEXT_EXTENSIONS = {
+    TEXT_EXTENSIONS = frozenset({
         ".txt", ".js", ".html", ".htm", ".py", ".cpp", ".c", ".h", ".hpp",
         ".css", ".json", ".xml", ".md", ".yaml", ".yml", ".ini", ".cfg", ".sh", ".bat",
         ".java", ".cs", ".go", ".rs", ".php", ".rb", ".sql", ".log", ".csv"
-    }
-    IMAGE_EXTENSIONS = {
+    })
+    IMAGE_EXTENSIONS = frozenset({
         ".jpg", ".jpeg", ".png", ".bmp", ".tif", ".tiff", ".webp"
-    }
+    })
+    MAX_TEXT_BYTES = 2 * 1024 * 1024
 
     def __init__(self, client: RequestClient):
         self.client = client
         self._rapid_ocr = None
+        self._list_cache = {}
 
     def get_downloadable_files(self, code_value: str) -> dict:
-        resp = self.client.get_file_list(code_value)
+        cached = self._list_cache.get(code_value)
+        resp = self.client.get_file_list(
+            code_value,
+            etag=cached["etag"] if cached else None,
+            last_modified=cached["last_modified"] if cached else None,
+        )
+        if resp.status_code == 304 and cached:
+            return {"success": True, "files": cached["files"]}
         if resp.status_code != 200:
             return {"success": False, "message": "[下载] 查询失败！服务器故障或服务器地址错误。"}
-        json_data = resp.json()
-        if not json_data.get("success"):
-            return {"success": False, "message": "[下载] 当前验证码下没有可下载的文件。"}
-        files = json_data.get("data") or []
+        json_data = safe_json(resp)
+        files = (json_data.get("data") or []) if json_data.get("success") else []
         if not files:
+            self._list_cache.pop(code_value, None)
             return {"success": False, "message": "[下载] 当前验证码下没有可下载的文件。"}
+
+        etag = resp.headers.get("ETag")
+        last_modified = resp.headers.get("Last-Modified")
+        if etag or last_modified:
+            self._list_cache[code_value] = {
+                "etag": etag,
+                "last_modified": last_modified,
+                "files": files,
+            }
+        else:
+            self._list_cache.pop(code_value, None)
         return {"success": True, "files": files}
 
     def build_download_display_name(self, selected_names: List[str]) -> str:
@@ -520,18 +720,33 @@ class DownloadService:
 
     def load_text_content(self, file_id: str) -> dict:
         resp = self.client.download_file(file_id)
-        if resp.status_code != 200:
-            return {"success": False, "status_code": resp.status_code}
-
         try:
-            content = resp.content
-            text = decode_response_content(content)
-            if text is None:
-                return {"success": False, "decode_failed": True}
+            if resp.status_code != 200:
+                return {"success": False, "status_code": resp.status_code}
+
+            chunks = []
+            received = 0
+            truncated = False
+            for chunk in resp.iter_content(chunk_size=64 * 1024):
+                chunks.append(chunk)
+                received += len(chunk)
+                if received > self.MAX_TEXT_BYTES:
+                    truncated = True
+                    break
+
+            content = b"".join(chunks)
+            if truncated:
+                content = content[:self.MAX_TEXT_BYTES]
+
+            text = decode_response_content(
+                content, resp.headers.get("Content-Type"), final=not truncated
+            )
             text = text.replace("\r\n", "\n").replace("\r", "\n")
-            return {"success": True, "text": text}
+            return {"success": True, "text": text, "truncated": truncated}
         except Exception as e:
             return {"success": False, "exception": e}
+        finally:
+            resp.close()
 
     def can_load_to_text(self, file_name: str) -> bool:
         ext = os.path.splitext(file_name)[1].lower()
@@ -555,10 +770,10 @@ class DownloadService:
 
     def ocr_image_content(self, file_id: str, file_name: str) -> dict:
         resp = self.client.download_file(file_id)
-        if resp.status_code != 200:
-            return {"success": False, "status_code": resp.status_code}
-
         try:
+            if resp.status_code != 200:
+                return {"success": False, "status_code": resp.status_code}
+
             engine = self._get_rapid_ocr_engine()
 
             result = engine(resp.content)
@@ -579,7 +794,9 @@ class DownloadService:
                 "success": False,
                 "exception": e,
             }
-            
+        finally:
+            resp.close()
+
     def ocr_local_image(self, file_path: str) -> dict:
         try:
             with open(file_path, "rb") as f:
@@ -631,6 +848,7 @@ class AppPresenter:
         self.scheduler = scheduler
         self.logger = logger
         self.view = None
+        self._transfer_lock = Lock()
 
     def bind_view(self, view):
         self.view = view
@@ -641,8 +859,11 @@ class AppPresenter:
     def on_request_error(self, exception, url):
         self.log(f"网络请求异常：{exception} - {url}")
 
+    def on_task_error(self, exception):
+        self.log(f"后台任务异常：{exception}")
+
     def is_host_configured(self):
-        return bool(self.client.host.strip())
+        return self.state.host_configured
 
     def ensure_host_configured(self, auto_popup: bool):
         if self.is_host_configured():
@@ -662,7 +883,15 @@ class AppPresenter:
             self.scheduler.call_ui(lambda: self.view.after(200, lambda: self.view.show_host_config("startup")))
             return
 
+        is_valid_host, normalized_host = normalize_host(host)
+        if not is_valid_host:
+            self.log(f"[配置] 配置文件中的服务器地址无效：{host}，请重新配置。")
+            self.scheduler.call_ui(lambda: self.view.after(200, lambda: self.view.show_host_config("runtime")))
+            return
+
+        host = normalized_host
         self.client.host = host
+        self.state.host_configured = True
         self.log(f"[配置] 已从配置文件读取服务器地址：{host}")
 
         if saved_code and len(saved_code) == 6 and saved_code.isdigit():
@@ -676,15 +905,20 @@ class AppPresenter:
         else:
             self.config_manager.save_code("")
         self.state.stop_event.set()
+        self.client.close()
 
     def save_host(self, host: str):
         self.client.host = host
+        self.state.host_configured = bool(host)
         self.config_manager.save_host(host)
         self.log(f"[配置] 已设置服务器地址：{host}")
 
     def validate_code_input(self, new_value: str) -> bool:
         return self.verification_service.validate_code_input(new_value)
 
+    def _get_active_code(self) -> str:
+        return self.state.current_code or self.view.get_code_input()
+
     def on_unlock_clicked(self):
         if not self.ensure_host_configured(auto_popup=True):
             return
@@ -705,6 +939,11 @@ class AppPresenter:
                 self.log(payload["message"])
                 return
 
+            if payload["type"] == "poll_stopped":
+                self.log(payload["message"])
+                self.scheduler.call_ui(self.stop_monitor)
+                return
+
             if payload["type"] == "check_result":
                 result = payload["result"]
                 message = result.get("message")
@@ -713,17 +952,29 @@ class AppPresenter:
 
                 if result.get("became_unlocked"):
                     self.state.locked = False
-                    self.scheduler.call_ui(self.view.apply_unlocked_ui, code_value)
 
                 if result.get("became_locked"):
                     self.state.locked = True
-                    self.scheduler.call_ui(self.view.apply_locked_ui)
 
-                if result.get("need_clear_code"):
-                    self.scheduler.call_ui(self.view.clear_code_input)
+                if (
+                    result.get("became_unlocked")
+                    or result.get("became_locked")
+                    or result.get("need_clear_code")
+                ):
+                    self.scheduler.call_ui(self._apply_check_result_ui, result, code_value)
 
         self.verification_service.monitor_loop(code_value, on_tick)
 
+    def _apply_check_result_ui(self, result: dict, code_value: str):
+        if result.get("became_unlocked"):
+            self.view.apply_unlocked_ui(code_value)
+
+        if result.get("became_locked"):
+            self.view.apply_locked_ui()
+
+        if result.get("need_clear_code"):
+            self.view.clear_code_input()
+
     def stop_monitor(self):
         self.verification_service.stop_monitor_state()
         self.scheduler.call_ui(self.view.apply_stopped_monitor_ui)
@@ -751,7 +1002,7 @@ class AppPresenter:
         text_value = self.view.get_main_text()
         if text_value.strip():
             self.log("[上传] 正在上传文本内容...")
-            self.scheduler.run_background(self._upload_text_worker, text_value)
+            self.scheduler.run_upload(self._upload_text_worker, text_value, self._get_active_code())
         else:
             self.log("[上传] 失败，当前文本框为空。")
 
@@ -764,7 +1015,7 @@ class AppPresenter:
         if not self.ensure_host_configured(auto_popup=True):
             return
 
-        code_value = self.view.get_code_input()
+        code_value = self._get_active_code()
 
         for p in paths:
             p = p.strip()
@@ -778,7 +1029,7 @@ class AppPresenter:
 
                 if use_ocr:
                     self.log(f"[OCR] 已选择 OCR，正在识别图片：{file_name} ...")
-                    self.scheduler.run_background(
+                    self.scheduler.run_upload(
                         self._ocr_and_upload_file_worker,
                         p,
                         code_value,
@@ -786,44 +1037,55 @@ class AppPresenter:
                     continue
 
             self.log(f"[上传] 正在上传文件：{file_name} ...")
-            self.scheduler.run_background(self._upload_file_worker, p)
+            self.scheduler.run_upload(self._upload_file_worker, p, code_value)
 
-    def _upload_text_worker(self, text_value: str):
+    def _begin_transfer(self):
+        with self._transfer_lock:
+            self.state.active_transfers += 1
         self.scheduler.call_ui(self.view.set_transfer_buttons_enabled, False)
-        result = self.transfer_service.upload_with_retry(
-            code_value=self.view.get_code_input(),
-            text_value=text_value,
-            file_path=None,
-        )
 
-        for msg in result["logs"]:
-            self.log(msg)
+    def _end_transfer(self):
+        with self._transfer_lock:
+            self.state.active_transfers -= 1
+            all_done = self.state.active_transfers == 0
+        if all_done:
+            self.scheduler.call_ui(self.view.set_transfer_buttons_enabled, True)
 
-        if result["need_stop_monitor"]:
-            self.scheduler.call_ui(self.stop_monitor)
+    def _upload_text_worker(self, text_value: str, code_value: str):
+        self._begin_transfer()
+        try:
+            result = self.transfer_service.upload_with_retry(
+                code_value=code_value,
+                text_value=text_value,
+                file_path=None,
+            )
 
-        self.scheduler.call_ui(self.view.set_transfer_buttons_enabled, True)
+            for msg in result["logs"]:
+                self.log(msg)
 
-    def _upload_file_worker(self, file_path: str):
-        self.scheduler.call_ui(self.view.set_transfer_buttons_enabled, False)
-        result = self.transfer_service.upload_with_retry(
-            code_value=self.view.get_code_input(),
-            file_path=file_path,
-        )
+            if result["need_stop_monitor"]:
+                self.scheduler.call_ui(self.stop_monitor)
+        finally:
+            self._end_transfer()
 
-        for msg in result["logs"]:
-            self.log(msg)
+    def _upload_file_worker(self, file_path: str, code_value: str):
+        self._begin_transfer()
+        try:
+            result = self.transfer_service.upload_with_retry(
+                code_value=code_value,
+                file_path=file_path,
+            )
 
-        if result["need_stop_monitor"]:
-            self.scheduler.call_ui(self.stop_monitor)
+            for msg in result["logs"]:
+                self.log(msg)
 
-        self.scheduler.call_ui(self.view.set_transfer_buttons_enabled, True)
+            if result["need_stop_monitor"]:
+                self.scheduler.call_ui(self.stop_monitor)
+        finally:
+            self._end_transfer()
         
     def _ocr_and_upload_file_worker(self, file_path: str, code_value: str):
-        self.scheduler.call_ui(
-            self.view.set_transfer_buttons_enabled,
-            False,
-        )
+        self._begin_transfer()
 
         file_name = os.path.basename(file_path)
 
@@ -875,10 +1137,7 @@ class AppPresenter:
                 self.scheduler.call_ui(self.stop_monitor)
 
         finally:
-            self.scheduler.call_ui(
-                self.view.set_transfer_buttons_enabled,
-                True,
-            )
+            self._end_transfer()
 
     def on_download_clicked(self):
         if self.state.locked:
@@ -888,7 +1147,7 @@ class AppPresenter:
         if not self.ensure_host_configured(auto_popup=True):
             return
 
-        code_value = self.view.get_code_input()
+        code_value = self._get_active_code()
         if not code_value:
             self.log("[下载] 请先输入验证码。")
             return
@@ -904,32 +1163,28 @@ class AppPresenter:
         self.scheduler.call_ui(self.view.show_download_dialog, result["files"])
 
     def download_files_async(self, file_ids: List[str], display_name: str):
-        self.scheduler.run_background(self._download_files_worker, file_ids, display_name)
+        save_path = self.view.ask_save_path(display_name)
+        if not save_path:
+            self.log(f"[下载] 已取消保存「{display_name}」。")
+            return
+        self.scheduler.run_background(self._download_files_worker, file_ids, display_name, save_path)
 
-    def _download_files_worker(self, file_ids: List[str], display_name: str):
+    def _download_files_worker(self, file_ids: List[str], display_name: str, save_path: str):
         self.log(f"[下载] 开始下载文件：{display_name} ...")
         resp = self.download_service.download_stream(file_ids)
-
-        def ui_after_resp():
+        try:
             if resp.status_code != 200:
                 self.log(f"[下载] 失败！服务器返回状态码 {resp.status_code}。")
                 return
 
-            save_path = self.view.ask_save_path(display_name)
-            if not save_path:
-                self.log(f"[下载] 已取消保存「{display_name}」。")
-                return
-
-            try:
-                with open(save_path, "wb") as f:
-                    for chunk in resp.iter_content(chunk_size=8192):
-                        if chunk:
-                            f.write(chunk)
-                self.log(f"[下载] 完成，文件「{display_name}」已保存到：{save_path}")
-            except Exception as e:
-                self.log(f"[下载] 保存失败：{e}")
-
-        self.scheduler.call_ui(ui_after_resp)
+            resp.raw.decode_content = True
+            with open(save_path, "wb") as f:
+                shutil.copyfileobj(resp.raw, f, length=1024 * 1024)
+            self.log(f"[下载] 完成，文件「{display_name}」已保存到：{save_path}")
+        except Exception as e:
+            self.log(f"[下载] 保存失败：{e}")
+        finally:
+            resp.close()
 
     def load_file_to_text_async(self, file_id: str, file_name: str):
         self.scheduler.run_background(self._load_file_to_text_worker, file_id, file_name)
@@ -973,9 +1228,6 @@ class AppPresenter:
                 if result.get("status_code") is not None:
                     self.log(f"[加载] 失败！服务器返回状态码 {result['status_code']}。")
                     return
-                if result.get("decode_failed"):
-                    self.log("[加载] 失败：无法解析文件编码。")
-                    return
                 if result.get("exception") is not None:
                     self.log(f"[加载] 失败：{result['exception']}")
                     return
@@ -983,7 +1235,11 @@ class AppPresenter:
                 return
 
             self.view.set_main_text(result["text"])
-            self.log(f"[加载] 完成，文件「{file_name}」已加载到文本输入框。")
+            if result.get("truncated"):
+                limit_mb = self.download_service.MAX_TEXT_BYTES // (1024 * 1024)
+                self.log(f"[加载] 完成，文件「{file_name}」过大，仅加载了前 {limit_mb} MB 内容到文本输入框。")
+            else:
+                self.log(f"[加载] 完成，文件「{file_name}」已加载到文本输入框。")
 
         self.scheduler.call_ui(ui_after_resp)
 
@@ -1001,9 +1257,14 @@ class AppPresenter:
 # ============================
 class App(TkinterDnD.Tk):
     BASE_TITLE = "税务云文件中转客户端"
+    LOG_MAX_LINES = 2000
+    LOG_FLUSH_MS = 100
 
     def __init__(self):
         super().__init__()
+        self._log_buffer = deque()
+        self._log_flush_scheduled = False
+        self._log_timestamp = (None, "")
         self.style = tb.Style("flatly")
         self.title(self.BASE_TITLE)
         self.iconphoto(True, tk.PhotoImage(data=Icon.icon))
@@ -1038,6 +1299,7 @@ class App(TkinterDnD.Tk):
         )
         self.presenter.bind_view(self)
         self.client.error_handler = self.presenter.on_request_error
+        self.scheduler.error_handler = self.presenter.on_task_error
 
         self._build_ui()
         self.apply_locked_ui()
@@ -1159,18 +1421,38 @@ class App(TkinterDnD.Tk):
     # ----------------------------
     # UI 基础能力
     # ----------------------------
+    def _format_log_timestamp(self) -> str:
+        now = int(time.time())
+        last_second, timestamp = self._log_timestamp
+        if now != last_second:
+            timestamp = time.strftime("%Y-%m-%d %H:%M:%S", time.localtime(now))
+            self._log_timestamp = (now, timestamp)
+        return timestamp
+
     def append_log(self, message):
-        def write_log(message):
-            timestamp = datetime.now().strftime("%Y-%m-%d %H:%M:%S")
-            self.text_log.configure(state="normal")
-            self.text_log.insert("end", f"[{timestamp}] {message}\n")
-            self.text_log.see("end")
-            self.text_log.configure(state="disabled")
+        timestamp = self._format_log_timestamp()
+        self._log_buffer.append(f"[{timestamp}] {message}\n")
+        if self._log_flush_scheduled:
+            return
 
-        if current_thread() is main_thread():
-            write_log(message)
-        else:
-            self.after(0, lambda: write_log(message))
+        self._log_flush_scheduled = True
+        self.after(self.LOG_FLUSH_MS, self._flush_log)
+
+    def _flush_log(self):
+        self._log_flush_scheduled = False
+        lines = []
+        while self._log_buffer:
+            lines.append(self._log_buffer.popleft())
+        if not lines:
+            return
+
+        self.text_log.configure(state="normal")
+        self.text_log.insert("end", "".join(lines))
+        excess = int(self.text_log.index("end-1c").split(".")[0]) - 1 - self.LOG_MAX_LINES
+        if excess > 0:
+            self.text_log.delete("1.0", f"{excess + 1}.0")
+        self.text_log.see("end")
+        self.text_log.configure(state="disabled")
 
     def get_code_input(self) -> str:
         return self.entry_code.get()
@@ -1268,6 +1550,7 @@ class App(TkinterDnD.Tk):
     # ----------------------------
     def _on_closing(self):
         self.presenter.on_closing()
+        self.scheduler.shutdown()
         self.destroy()
 
     def show_host_config(self, reason: str = "manual"):
@@ -1412,9 +1695,10 @@ class App(TkinterDnD.Tk):
         id_name_list: List[Tuple[str, str]] = []
         for f in files:
             file_id = str(f.get("id"))
-            file_name = f.get("fileName") or file_id
-            id_name_list.append((file_id, file_name))
-            listbox.insert("end", file_name)
+            id_name_list.append((file_id, f.get("fileName") or file_id))
+        listbox.insert("end", *(name for _, name in id_name_list))
+        loadable_flags = [self.presenter.can_load_to_text(name) for _, name in id_name_list]
+        ocr_flags = [self.presenter.can_ocr_to_text(name) for _, name in id_name_list]
 
         btn_frame = tb.Frame(win)
         btn_frame.pack(fill="x", padx=10, pady=(0, 10))
@@ -1433,14 +1717,16 @@ class App(TkinterDnD.Tk):
                 selected_names.append(fname)
 
             display_name = self.presenter.build_download_display_name(selected_names)
-            self.presenter.download_files_async(selected_ids, display_name)
             win.destroy()
+            self.presenter.download_files_async(selected_ids, display_name)
 
         def on_load_to_text():
             selection = listbox.curselection()
             if len(selection) != 1:
                 return
             idx = selection[0]
+            if not loadable_flags[idx]:
+                return
             fid, fname = id_name_list[idx]
             self.presenter.load_file_to_text_async(fid, fname)
             win.destroy()
@@ -1450,11 +1736,20 @@ class App(TkinterDnD.Tk):
             if len(selection) != 1:
                 return
             idx = selection[0]
+            if not ocr_flags[idx]:
+                return
             fid, fname = id_name_list[idx]
             self.presenter.ocr_file_to_text_async(fid, fname)
             win.destroy()
 
-        def update_load_button_state(event=None):
+        pending_update = None
+
+        def update_load_button_state():
+            nonlocal pending_update
+            pending_update = None
+            if not win.winfo_exists():
+                return
+
             selection = listbox.curselection()
 
             btn_load_text.config(state="disabled")
@@ -1464,14 +1759,19 @@ class App(TkinterDnD.Tk):
                 return
 
             idx = selection[0]
-            _, fname = id_name_list[idx]
 
-            if self.presenter.can_load_to_text(fname):
+            if loadable_flags[idx]:
                 btn_load_text.config(state="normal")
 
-            if self.presenter.can_ocr_to_text(fname):
+            if ocr_flags[idx]:
                 btn_ocr_text.config(state="normal")
 
+        def on_listbox_select(event=None):
+            nonlocal pending_update
+            if pending_update is not None:
+                self.after_cancel(pending_update)
+            pending_update = self.after(50, update_load_button_state)
+
         btn_download = tb.Button(btn_frame, text="下载选中文件", bootstyle=SUCCESS, command=on_download_selected)
         btn_download.pack(side=LEFT)
 
@@ -1495,7 +1795,7 @@ class App(TkinterDnD.Tk):
         btn_close = tb.Button(btn_frame, text="关闭", bootstyle=SECONDARY, command=win.destroy)
         btn_close.pack(side=RIGHT)
 
-        listbox.bind("<<ListboxSelect>>", update_load_button_state)
+        listbox.bind("<<ListboxSelect>>", on_listbox_select)
         self.show_modal(win)
 
     def _choose_files(self):
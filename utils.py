@@ -1,10 +1,27 @@
+import codecs
 import re
 import ipaddress
 from urllib.parse import urlsplit
 import ctypes
-from threading import Thread
+import traceback
+import uuid
+from io import BytesIO
+from queue import Queue
+from threading import Lock, Thread
 from datetime import datetime
 
+try:
+    import orjson
+except ImportError:
+    orjson = None
+
+_SCHEME_RE = re.compile(r"^[A-Za-z][A-Za-z0-9+.-]*://")
+_IPV6_BRACKET_RE = re.compile(r"^\[([^\]]+)\](?::(\d+))?$")
+_CHARSET_RE = re.compile(r"charset=[\"']?([\w.:-]+)", re.I)
+_SINGLE_BYTE_CHARSETS = frozenset({"iso8859-1", "cp1252"})
+_HOST_CHARS_RE = re.compile(r"^[A-Za-z0-9.-]+$")
+_HOST_LABEL_RE = re.compile(r"^[A-Za-z0-9](?:[A-Za-z0-9-]{0,61}[A-Za-z0-9])?$")
+
 class LASTINPUTINFO(ctypes.Structure):
     _fields_ = [
         ('cbSize', ctypes.c_uint),
@@ -34,7 +51,7 @@ def normalize_host(raw):
 
     s = s.strip(" \t\r\n<>\"'")
 
-    if re.match(r"^[A-Za-z][A-Za-z0-9+.-]*://", s):
+    if _SCHEME_RE.match(s):
         parts = urlsplit(s)
     else:
         parts = urlsplit("//" + s)
@@ -76,7 +93,7 @@ def _split_host_port(netloc):
     n = netloc.strip()
 
     if n.startswith("["):
-        m = re.match(r"^\[([^\]]+)\](?::(\d+))?$", n)
+        m = _IPV6_BRACKET_RE.match(n)
         if not m:
             return None, None
         host = m.group(1)
@@ -96,23 +113,20 @@ def _split_host_port(netloc):
 
 
 def _validate_and_normalize_host(host):
-    try:
-        ip = ipaddress.ip_address(host)
-        return True, ip.compressed
-    except ValueError:
-        pass
-
-    h = host.lower()
+    if host and (host[0].isdigit() or ":" in host):
+        try:
+            ip = ipaddress.ip_address(host)
+            return True, ip.compressed
+        except ValueError:
+            pass
 
-    if any(c.isspace() for c in h):
-        return False, ""
-    if "/" in h or "\\" in h:
+    if len(host) > 253:
         return False, ""
-    if len(h) > 253:
-        return False, ""
-    if not re.compile(r"^[A-Za-z0-9.-]+$").match(h):
+    if not _HOST_CHARS_RE.fullmatch(host):
         return False, ""
 
+    h = host.lower()
+
     labels = h.split(".")
     if any(lbl == "" for lbl in labels):
         return False, ""
@@ -123,7 +137,7 @@ def _validate_and_normalize_host(host):
     for lbl in labels:
         if len(lbl) > 63:
             return False, ""
-        if not re.compile(r"^[A-Za-z0-9](?:[A-Za-z0-9-]{0,61}[A-Za-z0-9])?$").match(lbl):
+        if not _HOST_LABEL_RE.match(lbl):
             return False, ""
 
     return True, h
@@ -131,16 +145,140 @@ def _validate_and_normalize_host(host):
 def get_filename_suffix():
     return datetime.now().strftime("%m%d%H%M%S")
     
-def run_async(func, *args):
-    t = Thread(target=func, args=args, daemon=True)
-    t.start()
-    return t
+class WorkerPool:
+    def __init__(self, max_workers, name="worker", error_handler=None):
+        self.max_workers = max_workers
+        self.name = name
+        self.error_handler = error_handler
+        self._tasks = Queue()
+        self._threads = []
+        self._idle = 0
+        self._lock = Lock()
+        self._shutdown = False
+
+    def submit(self, func, *args, **kwargs):
+        with self._lock:
+            if self._shutdown:
+                return
+            self._tasks.put((func, args, kwargs))
+            if self._tasks.qsize() > self._idle and len(self._threads) < self.max_workers:
+                t = Thread(
+                    target=self._worker,
+                    name=f"{self.name}-{len(self._threads)}",
+                    daemon=True,
+                )
+                self._threads.append(t)
+                t.start()
+
+    def shutdown(self):
+        with self._lock:
+            self._shutdown = True
+            for _ in self._threads:
+                self._tasks.put(None)
+
+    def _worker(self):
+        while True:
+            with self._lock:
+                self._idle += 1
+            task = self._tasks.get()
+            with self._lock:
+                self._idle -= 1
+            if task is None:
+                return
+            func, args, kwargs = task
+            try:
+                func(*args, **kwargs)
+            except Exception as e:
+                if self.error_handler is None:
+                    traceback.print_exc()
+                    continue
+                try:
+                    self.error_handler(e)
+                except Exception:
+                    traceback.print_exc()
     
-def decode_response_content(content):
-    encodings = ['utf-8', 'gbk', 'gb2312', 'utf-16', 'latin-1']
+def _quote_multipart_param(value):
+    return str(value).translate({10: "%0A", 13: "%0D", 34: "%22"})
+
+
+class MultipartFileStream:
+    def __init__(self, fields, file_field, file_name, file_obj, file_size, mime):
+        boundary = uuid.uuid4().hex
+        self.content_type = f"multipart/form-data; boundary={boundary}"
+
+        head = []
+        for name, value in fields.items():
+            head.append(
+                f"--{boundary}\r\n"
+                f'Content-Disposition: form-data; name="{_quote_multipart_param(name)}"\r\n\r\n'
+                f"{value}\r\n"
+            )
+        head.append(
+            f"--{boundary}\r\n"
+            f'Content-Disposition: form-data; name="{_quote_multipart_param(file_field)}"; '
+            f'filename="{_quote_multipart_param(file_name)}"\r\n'
+            f"Content-Type: {mime}\r\n\r\n"
+        )
+        head_bytes = "".join(head).encode("utf-8")
+        tail_bytes = f"\r\n--{boundary}--\r\n".encode("utf-8")
+
+        self._parts = [BytesIO(head_bytes), file_obj, BytesIO(tail_bytes)]
+        self._index = 0
+        self.len = len(head_bytes) + file_size + len(tail_bytes)
+
+    def __len__(self):
+        return self.len
+
+    def read(self, size=-1):
+        while self._index < len(self._parts):
+            chunk = self._parts[self._index].read(size)
+            if chunk:
+                return chunk
+            self._index += 1
+        return b""
+    
+def _decode(content, encoding, final, errors="strict"):
+    return codecs.getincrementaldecoder(encoding)(errors=errors).decode(content, final)
+
+def _declared_charset(content_type):
+    if not content_type:
+        return None
+    m = _CHARSET_RE.search(content_type)
+    if not m:
+        return None
+    try:
+        info = codecs.lookup(m.group(1))
+    except LookupError:
+        return None
+    if not info._is_text_encoding or info.name in _SINGLE_BYTE_CHARSETS:
+        return None
+    return info.name
+
+def decode_response_content(content, content_type=None, final=True):
+    if content.startswith(b"\xef\xbb\xbf"):
+        return _decode(content, "utf-8-sig", final, errors="replace")
+    if content.startswith((b"\xff\xfe", b"\xfe\xff")):
+        return _decode(content, "utf-16", final, errors="replace")
+
+    encodings = ["utf-8", "gbk"]
+    charset = _declared_charset(content_type)
+    if charset and charset not in encodings:
+        encodings.insert(0, charset)
+
     for enc in encodings:
         try:
-            return content.decode(enc)
-        except:
+            return _decode(content, enc, final)
+        except UnicodeError:
             continue
-    return None
+    return content.decode("latin-1")
+
+def safe_json(resp):
+    if orjson is not None:
+        try:
+            return orjson.loads(resp.content)
+        except Exception:
+            pass
+    try:
+        return resp.json()
+    except Exception:
+        return {}